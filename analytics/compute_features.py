@@ -1,16 +1,23 @@
 # analytics/compute_features.py
 import os
 import sys
-import pandas as pd
-from sqlalchemy import text
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
-from sklearn.cluster import KMeans
+
+# Let BLAS/OpenMP use every core; must be set before numpy/sklearn are imported
+for _var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_var, str(os.cpu_count() or 1))
+
+import joblib  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from sklearn.decomposition import PCA  # noqa: E402
+from sklearn.cluster import MiniBatchKMeans  # noqa: E402
 
 # Add project root to path so we can import 'database'
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from database.db import get_engine  # noqa: E402
+from database.db import get_engine, copy_upsert, read_sql_df  # noqa: E402
+from analytics.export_projector_tsv import load_features, write_tsv  # noqa: E402
 
 
 # Feature set used for multivariate analysis (NO WIND)
@@ -18,16 +25,30 @@ FEATURE_COLS = ["temp_out", "out_hum", "bar", "rain_rate", "solar_rad", "uv_inde
 
 MODEL_VERSION = os.getenv("MODEL_VERSION", "pca3_kmeans_v1_nowind")
 KMEANS_K = int(os.getenv("KMEANS_K", "4"))
-
-
-def load_curated(eng) -> pd.DataFrame:
-    df = pd.read_sql(
-        text("""
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+PROJECTOR_OUT_DIR = os.getenv("PROJECTOR_OUT_DIR", "data/processed")
+FORCE_REFIT = os.getenv("FORCE_REFIT", "false").lower() == "true"
+
+
+def load_curated(since=None, updated_since=None) -> pd.DataFrame:
+    # since: rows strictly after this ts (appends); updated_since: rows touched by
+    # preprocessing after this updated_at (in-place corrections). Both None = full table.
+    conds, params = [], {}
+    if since is not None:
+        conds.append("ts > :since")
+        params["since"] = since
+    if updated_since is not None:
+        conds.append("updated_at > :updated_since")
+        params["updated_since"] = updated_since
+    where = f"WHERE {' OR '.join(conds)}" if conds else ""
+    df = read_sql_df(
+        f"""
             SELECT ts, temp_out, out_hum, bar, rain_rate, solar_rad, uv_index
             FROM bradford.weather_curated
+            {where}
             ORDER BY ts ASC;
-        """),
-        eng,
+        """,
+        params=params or None,
     )
     df["ts"] = pd.to_datetime(df["ts"], utc=True, errors="coerce")
     return df.dropna(subset=["ts"])
@@ -60,55 +81,90 @@ def ensure_features_table(eng) -> None:
 
 
 def upsert_features(eng, df_out: pd.DataFrame) -> None:
-    sql = text("""
-        INSERT INTO bradford.weather_features (
-            ts, model_version, cluster_label, pc1, pc2, pc3,
-            f_temp_out, f_out_hum, f_bar, f_rain_rate, f_solar_rad, f_uv_index
-        )
-        VALUES (
-            :ts, :model_version, :cluster_label, :pc1, :pc2, :pc3,
-            :f_temp_out, :f_out_hum, :f_bar, :f_rain_rate, :f_solar_rad, :f_uv_index
-        )
-        ON CONFLICT (ts) DO UPDATE SET
-            model_version = EXCLUDED.model_version,
-            cluster_label = EXCLUDED.cluster_label,
-            pc1 = EXCLUDED.pc1,
-            pc2 = EXCLUDED.pc2,
-            pc3 = EXCLUDED.pc3,
-            f_temp_out = EXCLUDED.f_temp_out,
-            f_out_hum = EXCLUDED.f_out_hum,
-            f_bar = EXCLUDED.f_bar,
-            f_rain_rate = EXCLUDED.f_rain_rate,
-            f_solar_rad = EXCLUDED.f_solar_rad,
-            f_uv_index = EXCLUDED.f_uv_index;
-    """)
-
-    records = df_out.to_dict(orient="records")
-    with eng.begin() as conn:
-        conn.execute(sql, records)
+    # COPY into a staging table + one INSERT ... ON CONFLICT (no per-row executemany)
+    copy_upsert(eng, df_out, "bradford.weather_features", key="ts")
+
+
+def curated_fingerprint(eng):
+    # MAX(updated_at) catches in-place corrections that leave MAX(ts)/COUNT(*) unchanged
+    with eng.connect() as conn:
+        max_ts, n, max_updated = conn.execute(
+            text("SELECT MAX(ts), COUNT(*), MAX(updated_at) FROM bradford.weather_curated;")
+        ).one()
+    iso = [pd.Timestamp(v).isoformat() if v is not None else None for v in (max_ts, max_updated)]
+    return f"{iso[0]}|{n}|{iso[1]}", max_updated
+
+
+def standardise(X: np.ndarray, mu: np.ndarray, sd: np.ndarray) -> np.ndarray:
+    return (X - mu) / sd
+
+
+def fit_models(X: np.ndarray) -> dict:
+    # Inline z-score (same as StandardScaler: ddof=0, zero-variance columns left unscaled)
+    mu = X.mean(axis=0, dtype=np.float32)
+    sd = X.std(axis=0, dtype=np.float32)
+    sd[sd == 0] = 1.0
+    Xz = standardise(X, mu, sd)
+
+    # Randomized solver only computes the 3 leading components
+    pca = PCA(n_components=3, svd_solver="randomized", iterated_power=4, random_state=42)
+    pcs = pca.fit_transform(Xz)
+
+    km = MiniBatchKMeans(
+        n_clusters=KMEANS_K,
+        batch_size=4096,
+        n_init=3,
+        max_iter=200,
+        reassignment_ratio=0.01,
+        random_state=42,
+    )
+    km.fit(pcs)
+    return {"mu": mu, "sd": sd, "pca": pca, "km": km}
+
+
+def apply_models(models: dict, X: np.ndarray):
+    Xz = standardise(X, models["mu"], models["sd"])
+    pcs = models["pca"].transform(Xz)
+    labels = models["km"].predict(pcs)
+    return Xz, pcs, labels
 
 
 def main():
     eng = get_engine()
     ensure_features_table(eng)
 
-    df = load_curated(eng)
+    # Fitted z-score params/PCA/KMeans are persisted per model version, together with
+    # the curated-table fingerprint (MAX(ts), COUNT(*), MAX(updated_at)), the last
+    # processed ts and the last seen updated_at.
+    model_path = os.path.join(MODEL_DIR, f"{MODEL_VERSION}_k{KMEANS_K}.joblib")
+    fingerprint, max_updated = curated_fingerprint(eng)
+    cached = joblib.load(model_path) if (os.path.exists(model_path) and not FORCE_REFIT) else None
+
+    if cached is not None and cached["fingerprint"] == fingerprint:
+        print("✅ weather_curated unchanged since last run; weather_features already up to date")
+        return
+
+    # Appended or corrected rows only: reuse fitted models and transform that slice
+    since = cached["last_ts"] if cached is not None else None
+    updated_since = cached.get("last_updated") if cached is not None else None
+    df = load_curated(since=since, updated_since=updated_since)
 
     # Need complete vectors for PCA/Clustering
     df_feat = df[["ts"] + FEATURE_COLS].dropna().copy()
     if df_feat.empty:
-        raise RuntimeError("No complete rows found for selected FEATURE_COLS in weather_curated.")
-
-    X = df_feat[FEATURE_COLS].astype(float).values
-
-    scaler = StandardScaler()
-    Xz = scaler.fit_transform(X)
+        if cached is None:
+            raise RuntimeError("No complete rows found for selected FEATURE_COLS in weather_curated.")
+        cached["fingerprint"] = fingerprint
+        cached["last_updated"] = max_updated
+        joblib.dump(cached, model_path)
+        print("✅ No new complete rows since last run; weather_features already up to date")
+        return
 
-    pca = PCA(n_components=3, random_state=42)
-    pcs = pca.fit_transform(Xz)
+    # float32 halves memory traffic; z-score/PCA/MiniBatchKMeans all preserve dtype
+    X = np.ascontiguousarray(df_feat[FEATURE_COLS].to_numpy(dtype=np.float32))
 
-    km = KMeans(n_clusters=KMEANS_K, n_init=10, random_state=42)
-    labels = km.fit_predict(pcs)
+    models = cached["models"] if cached is not None else fit_models(X)
+    Xz, pcs, labels = apply_models(models, X)
 
     # IMPORTANT: pass tz-aware timestamps as python datetime (best for TIMESTAMPTZ)
     df_out = pd.DataFrame({
@@ -128,11 +184,32 @@ def main():
 
     upsert_features(eng, df_out)
 
-    explained = (pca.explained_variance_ratio_ * 100).round(2)
-    print("✅ weather_features updated")
-    print(f"Model: {MODEL_VERSION} | KMeans K={KMEANS_K}")
+    # Refresh the Projector TSVs here, so the dashboard only serves files. Pure appends
+    # (every row after last_ts) extend the existing files; refits and corrections rewrite
+    # them from the full table.
+    appended_only = since is not None and df_feat["ts"].min() > since
+    vecs_path, meta_path = (os.path.join(PROJECTOR_OUT_DIR, f) for f in ("vecs.tsv", "meta.tsv"))
+    if appended_only and os.path.exists(vecs_path) and os.path.exists(meta_path):
+        write_tsv(df_out, PROJECTOR_OUT_DIR, append=True)
+    else:
+        write_tsv(load_features(), PROJECTOR_OUT_DIR)
+
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    # Corrections can be older than last_ts: never move the high-water mark back
+    last_ts = df_feat["ts"].max().to_pydatetime()
+    if since is not None:
+        last_ts = max(last_ts, since)
+    joblib.dump(
+        {"models": models, "fingerprint": fingerprint, "last_ts": last_ts, "last_updated": max_updated},
+        model_path,
+    )
+
+    explained = (models["pca"].explained_variance_ratio_.astype(float) * 100).round(2)
+    print("✅ weather_features updated" + (" (incremental, cached models)" if cached is not None else ""))
+    print(f"Model: {MODEL_VERSION} | MiniBatchKMeans K={KMEANS_K}")
     print(f"PCA explained variance (%): PC1={explained[0]}, PC2={explained[1]}, PC3={explained[2]}")
     print(f"Rows written: {len(df_out)}")
+    print(f"Projector TSVs: {vecs_path}, {meta_path}")
 
 
 if __name__ == "__main__":
@@ -1,48 +1,73 @@
 # analytics/export_projector_tsv.py
 import os
 import sys
+import numpy as np
 import pandas as pd
-from sqlalchemy import text
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from database.db import get_engine  # noqa: E402
+from database.db import read_sql_df  # noqa: E402
 
 
-def main():
-    eng = get_engine()
+META_COLS = [
+    "ts", "cluster_label", "model_version",
+    "f_temp_out", "f_out_hum", "f_bar", "f_rain_rate", "f_solar_rad", "f_uv_index"
+]
+
 
-    df = pd.read_sql(
-        text("""
+def load_features() -> pd.DataFrame:
+    return read_sql_df(
+        """
             SELECT
               ts, cluster_label, model_version,
               pc1, pc2, pc3,
               f_temp_out, f_out_hum, f_bar, f_rain_rate, f_solar_rad, f_uv_index
             FROM bradford.weather_features
             ORDER BY ts ASC;
-        """),
-        eng,
+        """
     )
 
-    if df.empty:
-        raise RuntimeError("No rows in bradford.weather_features. Run: python -m analytics.compute_features")
 
-    out_dir = os.getenv("PROJECTOR_OUT_DIR", "data/processed")
+def write_tsv(df: pd.DataFrame, out_dir: str, append: bool = False) -> tuple[str, str]:
+    """
+    Write vecs.tsv (PC1-PC3, no header) and meta.tsv for `df`; returns both paths.
+    append=True adds `df` to the end of existing files (meta header not repeated).
+    """
     os.makedirs(out_dir, exist_ok=True)
-
     vecs_path = os.path.join(out_dir, "vecs.tsv")
     meta_path = os.path.join(out_dir, "meta.tsv")
 
-    # Vectors
-    df[["pc1", "pc2", "pc3"]].to_csv(vecs_path, sep="\t", index=False, header=False)
+    # Vectors (numeric-only: np.savetxt formats in C, no pandas writer)
+    vecs = df[["pc1", "pc2", "pc3"]].to_numpy(dtype=np.float32)
+    with open(vecs_path, "ab" if append else "wb") as f:
+        np.savetxt(f, vecs, delimiter="\t", fmt="%.6f")
 
     # Metadata
-    meta_cols = [
-        "ts", "cluster_label", "model_version",
-        "f_temp_out", "f_out_hum", "f_bar", "f_rain_rate", "f_solar_rad", "f_uv_index"
-    ]
-    meta = df[meta_cols].copy()
-    meta["ts"] = meta["ts"].astype(str)
-    meta.to_csv(meta_path, sep="\t", index=False)
+    meta_cols = [c for c in META_COLS if c in df.columns]
+    # assign() swaps in the formatted ts without copying the other columns
+    meta = df[meta_cols].assign(ts=pd.to_datetime(df["ts"], utc=True).dt.strftime("%Y-%m-%dT%H:%M:%SZ"))
+    meta.to_csv(meta_path, sep="\t", index=False, chunksize=100_000, mode="a" if append else "w", header=not append)
+    return vecs_path, meta_path
+
+
+def write_range_tsv(df: pd.DataFrame, out_dir: str) -> str:
+    """
+    Export a date-range slice (e.g. the dashboard selection) into its own
+    out_dir/range_<start>_<end>/ folder, leaving the full-history files untouched.
+    Rows are written in ts order; returns the folder path.
+    """
+    ts = pd.to_datetime(df["ts"], utc=True)
+    range_dir = os.path.join(out_dir, f"range_{ts.min():%Y%m%d}_{ts.max():%Y%m%d}")
+    write_tsv(df.sort_values("ts", kind="stable"), range_dir)
+    return range_dir
+
+
+def main():
+    df = load_features()
+
+    if df.empty:
+        raise RuntimeError("No rows in bradford.weather_features. Run: python -m analytics.compute_features")
+
+    vecs_path, meta_path = write_tsv(df, os.getenv("PROJECTOR_OUT_DIR", "data/processed"))
 
     print("✅ Exported TensorFlow Projector files")
     print(f"Vectors:   {vecs_path}")
@@ -1,64 +1,142 @@
 # dashboard/app.py
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+import numpy as np
 import pandas as pd
 import streamlit as st
-from sqlalchemy import text
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
-from database.db import get_engine
-from dashboard.components import inject_theme
-
-from dashboard.views import overview, eda_explorer, daily_snapshot, trends, pca_regimes, andrews_curves, extremes
+from database.db import read_sql_df
+from dashboard.components import CACHE_TTL, inject_theme
 
 st.set_page_config(page_title="Bradford Weather Dashboard", layout="wide")
 inject_theme()
 
 
-@st.cache_data(ttl=300)
-def load_curated_range(date_start: str, date_end: str) -> pd.DataFrame:
-    eng = get_engine()
-    df = pd.read_sql(
-        text("""
-            SELECT *
-            FROM bradford.weather_curated
+@st.cache_data(ttl=CACHE_TTL)
+def _load_arrays(sql: str, params: dict, parse_dates: tuple[str, ...] = ()) -> dict[str, np.ndarray | pd.Categorical]:
+    # Cached as one numpy array per column (SoA): pickles without a BlockManager.
+    # Datetime columns are stored as naive UTC datetime64 and re-localised by _frame():
+    # connectorx hands back every TIMESTAMPTZ except parse_dates naive, the pandas path tz-aware.
+    # Text columns (model_version, csv_time) repeat a handful of values: kept as
+    # categoricals (int codes + small dictionary) instead of one Python str per row.
+    df = read_sql_df(sql, params=params, parse_dates=list(parse_dates))
+    out = {}
+    for c in df.columns:
+        col = df[c]
+        if isinstance(col.dtype, pd.DatetimeTZDtype):
+            col = col.dt.tz_convert(None)
+        elif pd.api.types.is_string_dtype(col.dtype) or col.dtype == object:
+            out[c] = pd.Categorical(col)
+            continue
+        out[c] = col.to_numpy()
+    return out
+
+
+def _frame(arrays: dict[str, np.ndarray | pd.Categorical]) -> pd.DataFrame:
+    df = pd.DataFrame(arrays, copy=False)
+    # Every datetime column comes back UTC-aware, whichever read_sql_df backend ran
+    for c in df.columns:
+        if df[c].dtype.kind == "M":
+            df[c] = df[c].dt.tz_localize("UTC")
+    return df
+
+
+def _require_utc_ts(df: pd.DataFrame) -> pd.DataFrame:
+    # Views rely on a tz-aware UTC ts (no per-view re-parsing); fail loudly if a backend changes that
+    ts = df["ts"]
+    if not isinstance(ts.dtype, pd.DatetimeTZDtype) or str(ts.dt.tz) != "UTC":
+        raise TypeError(f"Expected ts as datetime64[UTC], got {ts.dtype}")
+    return df
+
+
+def _load_range(table: str, date_start: str, date_end: str, cols: tuple[str, ...] | None, order: bool) -> pd.DataFrame:
+    # cols=None -> all columns; otherwise only the projected columns ("ts" always included).
+    # order=True only for consumers that plot/display rows in time order; unordered
+    # lets the planner skip the sort / use a parallel or bitmap scan.
+    select = "*" if cols is None else ", ".join(dict.fromkeys(("ts",) + tuple(cols)))
+    arrays = _load_arrays(
+        f"""
+            SELECT {select}
+            FROM {table}
             WHERE ts >= :tmin AND ts < :tmax
-            ORDER BY ts ASC;
-        """),
-        eng,
-        params={"tmin": date_start, "tmax": date_end},
+            {"ORDER BY ts ASC" if order else ""};
+        """,
+        {"tmin": date_start, "tmax": date_end},
+        ("ts",),
     )
-    df["ts"] = pd.to_datetime(df["ts"], utc=True, errors="coerce")
-    return df.dropna(subset=["ts"])
+    return _require_utc_ts(_frame(arrays))
+
 
+def load_curated_range(date_start: str, date_end: str, cols: tuple[str, ...] | None = None, order: bool = False) -> pd.DataFrame:
+    return _load_range("bradford.weather_curated", date_start, date_end, cols, order)
 
-@st.cache_data(ttl=300)
-def load_features_range(date_start: str, date_end: str) -> pd.DataFrame:
-    eng = get_engine()
-    df = pd.read_sql(
-        text("""
-            SELECT *
+
+def load_features_range(date_start: str, date_end: str, cols: tuple[str, ...] | None = None, order: bool = False) -> pd.DataFrame:
+    return _load_range("bradford.weather_features", date_start, date_end, cols, order)
+
+
+@st.cache_data(ttl=CACHE_TTL)
+def load_curated_bucketed(date_start: str, date_end: str, bucket: str, cols: tuple[str, ...]) -> pd.DataFrame:
+    # Downsample in Postgres: one AVG row per UTC `bucket` ('hour', 'day', ...) instead of raw rows
+    avgs = ", ".join(f"AVG({c}) AS {c}" for c in cols)
+    df = read_sql_df(
+        f"""
+            SELECT date_trunc(:bucket, ts, 'UTC') AS ts, {avgs}
+            FROM bradford.weather_curated
+            WHERE ts >= :tmin AND ts < :tmax
+            GROUP BY 1
+            ORDER BY 1;
+        """,
+        params={"bucket": bucket, "tmin": date_start, "tmax": date_end},
+        parse_dates=["ts"],
+    )
+    return df
+
+
+@st.cache_data(ttl=CACHE_TTL)
+def load_cluster_summary(date_start: str, date_end: str) -> pd.DataFrame:
+    # Per-cluster means aggregated in Postgres: k rows over the wire instead of N
+    df = read_sql_df(
+        """
+            SELECT
+              cluster_label,
+              AVG(f_temp_out) AS f_temp_out,
+              AVG(f_out_hum) AS f_out_hum,
+              AVG(f_bar) AS f_bar,
+              AVG(f_rain_rate) AS f_rain_rate,
+              AVG(f_solar_rad) AS f_solar_rad,
+              AVG(f_uv_index) AS f_uv_index
             FROM bradford.weather_features
             WHERE ts >= :tmin AND ts < :tmax
-            ORDER BY ts ASC;
-        """),
-        eng,
+            GROUP BY cluster_label
+            ORDER BY cluster_label;
+        """,
         params={"tmin": date_start, "tmax": date_end},
     )
-    df["ts"] = pd.to_datetime(df["ts"], utc=True, errors="coerce")
-    return df.dropna(subset=["ts"])
+    return df.set_index("cluster_label").round(3)
 
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=CACHE_TTL)
 def get_date_bounds():
-    eng = get_engine()
-    df = pd.read_sql(text("SELECT MIN(ts) AS min_ts, MAX(ts) AS max_ts FROM bradford.weather_curated;"), eng)
+    df = read_sql_df("SELECT MIN(ts) AS min_ts, MAX(ts) AS max_ts FROM bradford.weather_curated;")
     min_ts = pd.to_datetime(df.loc[0, "min_ts"], utc=True)
     max_ts = pd.to_datetime(df.loc[0, "max_ts"], utc=True)
     return min_ts, max_ts
 
 
+@st.cache_data
+def build_range(date_start, date_end) -> tuple[str, str]:
+    # [start 00:00 UTC, end + 1 day) as ISO strings (end date is inclusive)
+    ts0 = pd.Timestamp(date_start, tz="UTC")
+    ts1 = pd.Timestamp(date_end, tz="UTC") + pd.Timedelta(days=1)
+    return ts0.isoformat(), ts1.isoformat()
+
+
 # Sidebar navigation
 st.sidebar.title("🌦️ Bradford Weather")
 page = st.sidebar.radio(
@@ -73,6 +151,35 @@ st.sidebar.caption(f"Data range: {min_ts.date()} → {max_ts.date()}")
 # Range-based pages
 RANGE_PAGES = {"Overview", "Data Explorer (EDA)", "Trends", "PCA & Regimes", "Andrews Curves", "Extremes"}
 
+# Pages whose views rely on rows arriving in ts order (line charts, head() tables)
+ORDERED_PAGES = {"Overview", "Data Explorer (EDA)"}
+
+# Curated columns each page actually reads (None = all columns)
+PAGE_CURATED_COLS = {
+    "Overview": ("temp_out", "out_hum", "bar", "rain", "rain_rate", "solar_rad", "uv_index"),
+    "Data Explorer (EDA)": None,
+    "Trends": ("temp_out", "out_hum", "bar", "rain_rate", "solar_rad", "uv_index", "dew_pt"),
+    "Andrews Curves": ("temp_out", "out_hum", "bar", "rain_rate", "solar_rad", "uv_index"),
+    "Extremes": ("rain_rate", "temp_out", "solar_rad", "uv_index", "out_hum"),
+}
+
+# Feature columns each page reads (None = all: the PCA page discovers its f_* columns)
+PAGE_FEATURE_COLS = {
+    "PCA & Regimes": None,
+    "Andrews Curves": ("cluster_label",),
+}
+
+# Which range loaders each page needs: "c" = curated, "f" = features
+PAGE_LOADS = {
+    "Overview": ("c",),
+    "Data Explorer (EDA)": ("c",),
+    "Daily Snapshot": (),
+    "Trends": ("c",),
+    "PCA & Regimes": ("f",),
+    "Andrews Curves": ("c", "f"),
+    "Extremes": ("c",),
+}
+
 default_start = min_ts.date()
 default_end = max_ts.date()
 
@@ -84,25 +191,45 @@ else:
     date_start = default_start
     date_end = default_end
 
-date_start_ts = pd.Timestamp(date_start).tz_localize("UTC")
-date_end_ts = pd.Timestamp(date_end).tz_localize("UTC") + pd.Timedelta(days=1)
-range_start, range_end = date_start_ts.isoformat(), date_end_ts.isoformat()
-
-dfc = load_curated_range(range_start, range_end) if page in RANGE_PAGES else pd.DataFrame()
-dff = load_features_range(range_start, range_end) if page in RANGE_PAGES else pd.DataFrame()
-
-# Router
+range_start, range_end = build_range(date_start, date_end)
+
+needs = PAGE_LOADS[page]
+if page == "Trends" and not st.session_state.get("trends_corr_opened", False):
+    # Only the correlation heatmap reads raw curated rows, and it stays unloaded until opened
+    needs = ()
+dfc, dff = pd.DataFrame(), pd.DataFrame()
+if needs == ("c", "f"):
+    # Two independent DB round-trips: run them concurrently (worker threads get the
+    # script context so st.cache_data behaves as on the main thread)
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=2, initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)) as ex:
+        f_c = ex.submit(load_curated_range, range_start, range_end, PAGE_CURATED_COLS[page], page in ORDERED_PAGES)
+        f_f = ex.submit(load_features_range, range_start, range_end, PAGE_FEATURE_COLS[page])
+        dfc, dff = f_c.result(), f_f.result()
+elif "c" in needs:
+    dfc = load_curated_range(range_start, range_end, PAGE_CURATED_COLS[page], page in ORDERED_PAGES)
+elif "f" in needs:
+    dff = load_features_range(range_start, range_end, PAGE_FEATURE_COLS[page])
+
+# Router (views are imported on demand so a page only pays for its own plotly/sklearn imports)
 if page == "Overview":
+    from dashboard.views import overview
     overview.render(dfc)
 elif page == "Data Explorer (EDA)":
+    from dashboard.views import eda_explorer
     eda_explorer.render(dfc)
 elif page == "Daily Snapshot":
+    from dashboard.views import daily_snapshot
     daily_snapshot.render(min_ts, max_ts, load_curated_range)
 elif page == "Trends":
-    trends.render(dfc)
+    from dashboard.views import trends
+    trends.render(dfc, load_curated_bucketed(range_start, range_end, "day", PAGE_CURATED_COLS["Trends"]))
 elif page == "PCA & Regimes":
-    pca_regimes.render(dff)
+    from dashboard.views import pca_regimes
+    pca_regimes.render(dff, load_cluster_summary(range_start, range_end))
 elif page == "Andrews Curves":
+    from dashboard.views import andrews_curves
     andrews_curves.render(dfc, dff)
 else:
+    from dashboard.views import extremes
     extremes.render(dfc)
@@ -1,5 +1,6 @@
 # dashboard/components.py
 import math
+import numpy as np
 import pandas as pd
 import streamlit as st
 import plotly.graph_objects as go
@@ -18,6 +19,21 @@ def _safe_float(x):
         return None
 
 
+def _frame_key(d: pd.DataFrame):
+    # Cheap fingerprint instead of a full content hash: row count, ts bounds (min/max, so
+    # unordered loads key the same) and the column projection
+    if d.empty:
+        return (0, tuple(d.columns))
+    return (len(d), d["ts"].min(), d["ts"].max(), tuple(d.columns))
+
+
+# hash_funcs for st.cache_data helpers that take a range frame; pair with ttl=CACHE_TTL
+FRAME_HASH = {pd.DataFrame: _frame_key}
+
+# Shared by the app.py loaders and the view caches, so derived results expire with the data
+CACHE_TTL = 300
+
+
 def weather_icon(rain_rate, solar_rad, wind_speed=None):
     """
     Kept signature compatible with older calls.
@@ -39,6 +55,40 @@ def weather_icon(rain_rate, solar_rad, wind_speed=None):
     return "☁️", "Cloudy"
 
 
+def lttb_indices(x, y, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of n_out points that keep the visual
+    shape (peaks/troughs) of the line y(x). x, y must be NaN-free and x sorted.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # First/last points are kept; the n-2 inner points are split into n_out-2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        nlo = hi
+        nhi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[nlo:max(nhi, nlo + 1)].mean(), y[nlo:max(nhi, nlo + 1)].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+def lttb_frame(df: pd.DataFrame, x: str, y: str, n_out: int) -> pd.DataFrame:
+    # Rows of df[[x, y]] (NaNs dropped) kept by LTTB; x may be a datetime column
+    d = df[[x, y]].dropna()
+    return d.iloc[lttb_indices(d[x].astype("int64").to_numpy(), d[y].to_numpy(), n_out)]
+
+
 def temp_icon(temp_out):
     t = _safe_float(temp_out)
     if t is None:
@@ -90,8 +140,12 @@ background:rgba(255,255,255,0.12);font-size:18px;">{icon_t}</div>
 def gauge(title: str, value, vmin: float, vmax: float, suffix: str = ""):
     if value is None or (isinstance(value, float) and pd.isna(value)):
         value = 0.0
-    value = float(value)
+    return _gauge_figure(title, float(value), vmin, vmax, suffix)
+
 
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _gauge_figure(title: str, value: float, vmin: float, vmax: float, suffix: str) -> go.Figure:
+    # Shared across reruns/sessions without copying: callers must not mutate the figure
     fig = go.Figure(go.Indicator(
         mode="gauge+number",
         value=value,
@@ -109,9 +163,10 @@ def gauge(title: str, value, vmin: float, vmax: float, suffix: str = ""):
     return fig
 
 
-def inject_theme():
-    st.markdown(
-        """
+@st.cache_resource
+def _theme_css() -> str:
+    # Built once per server process and shared by every session
+    return """
         <style>
           .stApp {
             background: radial-gradient(1200px 600px at 15% 10%, rgba(80,130,255,0.25), transparent 60%),
@@ -121,6 +176,10 @@ def inject_theme():
           }
           .stMarkdown, .stText, .stCaption, .stDataFrame { color: rgba(255,255,255,0.92); }
         </style>
-        """,
-        unsafe_allow_html=True,
-    )
+        """
+
+
+def inject_theme():
+    # Must still be emitted on every run: Streamlit drops elements a rerun doesn't re-create,
+    # so a once-per-session guard would lose the theme after the first interaction.
+    st.markdown(_theme_css(), unsafe_allow_html=True)
@@ -2,26 +2,57 @@
 import numpy as np
 import pandas as pd
 import streamlit as st
-import plotly.express as px
+import plotly.graph_objects as go
+from scipy.ndimage import uniform_filter1d
 
+try:
+    from numba import njit
+except ImportError:  # optional: the SGEMM + uniform_filter1d path is used instead
+    njit = None
 
-def _andrews_curves_matrix(X: np.ndarray, t_points: int = 160):
-    t = np.linspace(-np.pi, np.pi, t_points)
-    n, d = X.shape
-    Y = np.zeros((n, t_points), dtype=float)
 
-    # x1/sqrt(2)
-    Y += (X[:, [0]] / np.sqrt(2.0))
+@st.cache_data(max_entries=32, show_spinner=False)
+def _build_basis(d: int, t_points: int):
+    # Depends only on (d, t_points): slider tweaks elsewhere reuse the cached trig
+    t = np.linspace(-np.pi, np.pi, t_points, dtype=np.float32)
 
-    k = 1
+    # Basis rows: 1/sqrt(2), sin(t), cos(t), sin(2t), cos(2t), ...
+    B = np.empty((d, t_points), dtype=np.float32)
+    B[0] = 1.0 / np.sqrt(2.0)
     for j in range(1, d):
-        if j % 2 == 1:
-            Y += X[:, [j]] * np.sin(k * t)
-        else:
-            Y += X[:, [j]] * np.cos(k * t)
-            k += 1
-
-    return t, Y
+        k = (j + 1) // 2
+        B[j] = np.sin(k * t) if j % 2 == 1 else np.cos(k * t)
+    return t, B
+
+
+def _andrews_curves_matrix(X: np.ndarray, B: np.ndarray) -> np.ndarray:
+    # Single float32 GEMM (SGEMM) instead of d broadcast multiply-adds
+    return np.ascontiguousarray(X, dtype=np.float32) @ B
+
+
+if njit is not None:
+    @njit(fastmath=True, cache=True)
+    def _andrews_fused(X, B, smooth_win):
+        # Basis product and box filter in one pass per row (row stays in L1);
+        # smooth_win=1 means no smoothing.
+        n, d = X.shape
+        T = B.shape[1]
+        h = smooth_win // 2
+        Y = np.empty((n, T), dtype=np.float32)
+        for i in range(n):
+            row = np.zeros(T, dtype=np.float32)
+            for j in range(d):
+                xij = X[i, j]
+                for ti in range(T):
+                    row[ti] += xij * B[j, ti]
+            # Running-sum box filter, edges padded with the nearest value (uniform_filter1d mode="nearest")
+            acc = np.float32(0.0)
+            for k in range(-h, h + 1):
+                acc += row[min(max(k, 0), T - 1)]
+            for ti in range(T):
+                Y[i, ti] = acc / smooth_win
+                acc += row[min(ti + h + 1, T - 1)] - row[max(ti - h, 0)]
+        return Y
 
 
 def render(dfc: pd.DataFrame, dff: pd.DataFrame):
@@ -51,47 +82,46 @@ def render(dfc: pd.DataFrame, dff: pd.DataFrame):
         st.info("Select at least 3 features.")
         return
 
-    base = dfc[["ts"] + cols].dropna().copy()
+    # Sample first; only the small (<= sample_n) frame is materialised and standardised
+    base = dfc[["ts"] + cols].dropna()
     if base.empty:
         st.warning("No complete rows after dropping missing values.")
         return
 
     if len(base) > sample_n:
         base = base.sample(sample_n, random_state=42).sort_values("ts")
+    base = base.reset_index(drop=True)
 
     if use_clusters:
-        key = dff[["ts", "cluster_label"]].copy()
-        key["ts"] = pd.to_datetime(key["ts"], utc=True, errors="coerce")
-        base = base.merge(key, on="ts", how="left")
+        # dff["ts"] is already tz-aware UTC (load_features_range raises otherwise); merge only reads key
+        base = base.merge(dff[["ts", "cluster_label"]], on="ts", how="left")
         base["cluster_label"] = base["cluster_label"].fillna(-1).astype(int)
     else:
         base["cluster_label"] = 0
 
-    X = base[cols].astype(float).values
-    X = (X - X.mean(axis=0)) / (X.std(axis=0) + 1e-9)
-
-    t, Y = _andrews_curves_matrix(X, t_points=t_points)
+    # float32 end-to-end: plot precision doesn't need float64
+    X = np.ascontiguousarray(base[cols].to_numpy(dtype=np.float32))
+    X = (X - X.mean(axis=0)) / (X.std(axis=0) + np.float32(1e-9))
 
-    if smooth:
-        kernel = np.ones(smooth_win) / smooth_win
-        Y = np.apply_along_axis(lambda y: np.convolve(y, kernel, mode="same"), 1, Y)
-
-    df_long = pd.DataFrame({
-        "series_id": np.repeat(np.arange(Y.shape[0]), len(t)),
-        "t": np.tile(t, Y.shape[0]),
-        "y": Y.reshape(-1),
-        "cluster_label": np.repeat(base["cluster_label"].values, len(t)),
-    })
+    t, B = _build_basis(X.shape[1], t_points)
+    if njit is not None:
+        Y = _andrews_fused(X, B, smooth_win)
+    else:
+        Y = _andrews_curves_matrix(X, B)
+        if smooth:
+            # Running-mean box filter over all rows at once (edges padded with nearest value)
+            Y = uniform_filter1d(Y, size=smooth_win, axis=1, mode="nearest")
 
     st.subheader("Andrews Curves (coloured by cluster)")
-    fig = px.line(
-        df_long,
-        x="t",
-        y="y",
-        color="cluster_label",
-        line_group="series_id",
-        title="Andrews curves"
-    )
+    # One WebGL trace per cluster: curves concatenated with NaN breaks between them
+    fig = go.Figure()
+    labels = base["cluster_label"].to_numpy()
+    for label in np.unique(labels):
+        idx = np.flatnonzero(labels == label)
+        xs = np.tile(np.append(t, np.nan), len(idx))
+        ys = np.hstack([Y[idx], np.full((len(idx), 1), np.nan, dtype=np.float32)]).ravel()
+        fig.add_trace(go.Scattergl(x=xs, y=ys, mode="lines", name=str(label), opacity=0.4))
+    fig.update_layout(title="Andrews curves", xaxis_title="t", yaxis_title="y", legend_title="cluster_label")
     st.plotly_chart(fig, use_container_width=True)
 
     if use_clusters:
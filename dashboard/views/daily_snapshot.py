@@ -1,9 +1,10 @@
 # dashboard/views/daily_snapshot.py
+import numpy as np
 import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
 import streamlit as st
 
-from dashboard.components import kpi_card, gauge, weather_icon, temp_icon, fmt
+from dashboard.components import CACHE_TTL, FRAME_HASH, kpi_card, gauge, weather_icon, temp_icon, fmt, lttb_indices
 
 
 def _day_slice_to_range(day: pd.Timestamp):
@@ -12,33 +13,63 @@ def _day_slice_to_range(day: pd.Timestamp):
     return start.isoformat(), end.isoformat()
 
 
+# Column -> reductions needed for the daily summary (computed in one agg call)
+DAY_AGGS = {
+    "temp_out": ["mean", "max", "min"],
+    "out_hum": ["mean"],
+    "bar": ["mean"],
+    "rain": ["max", "min"],
+    "rain_rate": ["max"],
+    "solar_rad": ["max"],
+    "uv_index": ["max"],
+}
+
+
 def _summarize_day(df_day: pd.DataFrame) -> dict:
     out = {}
     if df_day.empty:
         return out
 
-    out["temp_mean"] = df_day["temp_out"].mean() if "temp_out" in df_day else None
-    out["temp_max"] = df_day["temp_out"].max() if "temp_out" in df_day else None
-    out["temp_min"] = df_day["temp_out"].min() if "temp_out" in df_day else None
+    agg = df_day.agg({c: f for c, f in DAY_AGGS.items() if c in df_day.columns})
 
-    out["hum_mean"] = df_day["out_hum"].mean() if "out_hum" in df_day else None
-    out["bar_mean"] = df_day["bar"].mean() if "bar" in df_day else None
+    def safe_agg(col, func):
+        return agg.at[func, col] if col in agg.columns else None
 
-    out["rain_total"] = (
-        df_day["rain"].max() - df_day["rain"].min()
-        if "rain" in df_day and df_day["rain"].notna().any()
-        else None
-    )
-    out["rain_rate_max"] = df_day["rain_rate"].max() if "rain_rate" in df_day else None
+    out["temp_mean"] = safe_agg("temp_out", "mean")
+    out["temp_max"] = safe_agg("temp_out", "max")
+    out["temp_min"] = safe_agg("temp_out", "min")
+
+    out["hum_mean"] = safe_agg("out_hum", "mean")
+    out["bar_mean"] = safe_agg("bar", "mean")
 
-    out["solar_peak"] = df_day["solar_rad"].max() if "solar_rad" in df_day else None
-    out["uv_peak"] = df_day["uv_index"].max() if "uv_index" in df_day else None
+    rain_max, rain_min = safe_agg("rain", "max"), safe_agg("rain", "min")
+    out["rain_total"] = rain_max - rain_min if rain_max is not None and pd.notna(rain_max) else None
+    out["rain_rate_max"] = safe_agg("rain_rate", "max")
+
+    out["solar_peak"] = safe_agg("solar_rad", "max")
+    out["uv_peak"] = safe_agg("uv_index", "max")
 
     # wind is unavailable -> pass None
     out["icon"], out["condition"] = weather_icon(out.get("rain_rate_max"), out.get("solar_peak"), None)
     return out
 
 
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False, hash_funcs=FRAME_HASH)
+def _day_figure(df_pick: pd.DataFrame, pick: list, max_points: int = 2000) -> go.Figure:
+    # Cheap key (FRAME_HASH): a day's frame is identified by its length, ts bounds and columns.
+    # Dense series are LTTB-downsampled server-side to max_points per trace.
+    ts = df_pick["ts"]
+    ts_num = ts.astype("int64").to_numpy()
+    fig = go.Figure()
+    for c in pick:
+        y = df_pick[c].to_numpy(dtype=float)
+        ok = ~np.isnan(y)
+        keep = np.flatnonzero(ok)[lttb_indices(ts_num[ok], y[ok], max_points)]
+        fig.add_trace(go.Scattergl(x=ts.iloc[keep], y=y[keep], name=c, mode="lines"))
+    fig.update_layout(title="Within-day evolution", legend_title="metric")
+    return fig
+
+
 def render(min_ts, max_ts, load_curated_range):
     st.title("Daily Snapshot")
     st.caption("Daily summary layout (wind excluded due to sensor unavailability).")
@@ -51,7 +82,7 @@ def render(min_ts, max_ts, load_curated_range):
     )
 
     d0, d1 = _day_slice_to_range(pd.Timestamp(day))
-    df_day = load_curated_range(d0, d1)
+    df_day = load_curated_range(d0, d1, order=True)
     summary = _summarize_day(df_day)
 
     if df_day.empty:
@@ -119,13 +150,16 @@ def render(min_ts, max_ts, load_curated_range):
         pick = st.multiselect("Select series", cols, default=default_pick)
 
         if pick:
-            df_long = df_day[["ts"] + pick].melt(id_vars=["ts"], var_name="metric", value_name="value")
-            fig = px.line(df_long, x="ts", y="value", color="metric", title="Within-day evolution")
-            st.plotly_chart(fig, use_container_width=True)
+            # One column projection, reused by the figure builder
+            df_pick = df_day.loc[:, ["ts", *pick]]
+            st.plotly_chart(_day_figure(df_pick, pick), use_container_width=True)
 
     with tab_b:
         if "rain_rate" in df_day.columns:
-            fig = px.bar(df_day, x="ts", y="rain_rate", title="Rain rate")
+            # Peak rate per 15-min bucket: bounded bar count however dense the sensor is
+            binned = df_day.resample("15min", on="ts")["rain_rate"].max().dropna().reset_index()
+            fig = go.Figure(go.Bar(x=binned["ts"], y=binned["rain_rate"]))
+            fig.update_layout(title="Rain rate (15-min max)", xaxis_title="ts", yaxis_title="rain_rate")
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("rain_rate not available for this day.")
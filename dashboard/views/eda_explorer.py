@@ -4,6 +4,96 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
+from scipy.fft import irfft, next_fast_len, rfft
+
+from dashboard.components import CACHE_TTL, FRAME_HASH, lttb_frame
+
+
+@st.cache_data(show_spinner=False)
+def _numeric_cols(col_dtypes: tuple[tuple[str, str], ...]) -> list[str]:
+    # Keyed on (column, dtype) names only: no per-column Series slicing on reruns
+    return [c for c, t in col_dtypes if c != "ts" and pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(t))]
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False, hash_funcs=FRAME_HASH)
+def _variable_stats(dfc: pd.DataFrame, var: str) -> dict:
+    v = dfc[var].to_numpy(dtype=np.float64, na_value=np.nan)
+    n_total = len(v)
+    v = v[~np.isnan(v)]
+    n = len(v)
+    return {
+        "count": n,
+        "missing_%": round((n_total - n) / n_total * 100.0, 2) if n_total else 0.0,
+        "mean": float(v.mean()) if n else np.nan,
+        "median": float(np.median(v)) if n else np.nan,
+        "std": float(v.std(ddof=1)) if n > 1 else np.nan,
+        "min": float(v.min()) if n else np.nan,
+        "max": float(v.max()) if n else np.nan,
+    }
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False, hash_funcs=FRAME_HASH)
+def _resample_mean(dfc: pd.DataFrame, var: str, freq: str) -> pd.DataFrame:
+    return dfc.set_index("ts")[var].resample(freq).mean().reset_index()
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False, hash_funcs=FRAME_HASH)
+def _hours(dfc: pd.DataFrame) -> np.ndarray:
+    return dfc["ts"].dt.hour.to_numpy(np.int8)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False, hash_funcs=FRAME_HASH)
+def _hourly_bin_index(dfc: pd.DataFrame) -> np.ndarray:
+    # Hours since the first row's hour (unit-agnostic: datetime64[h] floors us/ns alike)
+    h = dfc["ts"].dt.tz_convert(None).to_numpy().astype("datetime64[h]").astype(np.int64)
+    return h - h.min()
+
+
+def _hourly_mean(bins: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # Same as resample("h").mean(): one value per hour from first to last, NaN for empty hours
+    valid = ~np.isnan(values)
+    n_bins = int(bins.max()) + 1
+    counts = np.bincount(bins[valid], minlength=n_bins)
+    sums = np.bincount(bins[valid], weights=values[valid], minlength=n_bins)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+def _lagged_corr(x: np.ndarray, y: np.ndarray, max_lag: int) -> np.ndarray:
+    """
+    Pearson r of x(t) vs y(t - lag) for lag in [-max_lag, max_lag], each over its pairwise-valid
+    samples (same as x.corr(y.shift(lag))), from a handful of FFT cross-correlations.
+    """
+    mx, my = ~np.isnan(x), ~np.isnan(y)
+    n = len(x)
+    if mx.sum() < 2 or my.sum() < 2:
+        return np.full(2 * max_lag + 1, np.nan)
+
+    # Standardise first so the raw-moment sums below don't cancel; NaNs become zeros (masked out)
+    x = np.where(mx, (x - np.nanmean(x)) / (np.nanstd(x) or 1.0), 0.0)
+    y = np.where(my, (y - np.nanmean(y)) / (np.nanstd(y) or 1.0), 0.0)
+
+    # Long enough that circular wrap-around never reaches the +-max_lag window
+    nfft = next_fast_len(max(n + max_lag, 2 * max_lag + 1))
+    F = rfft(np.vstack([x, x * x, mx]), nfft)
+    G = np.conj(rfft(np.vstack([y, y * y, my]), nfft))
+
+    def xcorr(a, b):
+        # sum_t a[t] * b[t - lag], lags -max_lag..max_lag
+        z = irfft(a * b, nfft)
+        return np.concatenate([z[nfft - max_lag:], z[:max_lag + 1]])
+
+    cnt = np.rint(xcorr(F[2], G[2]))
+    sx, sxx = xcorr(F[0], G[2]), xcorr(F[1], G[2])
+    sy, syy = xcorr(F[2], G[0]), xcorr(F[2], G[1])
+    sxy = xcorr(F[0], G[0])
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vx = sxx - sx * sx / cnt
+        vy = syy - sy * sy / cnt
+        r = (sxy - sx * sy / cnt) / np.sqrt(vx * vy)
+    r[(cnt < 2) | ~(vx > 1e-9) | ~(vy > 1e-9)] = np.nan
+    return np.clip(r, -1.0, 1.0)
 
 
 def render(dfc: pd.DataFrame):
@@ -18,265 +108,243 @@ def render(dfc: pd.DataFrame):
         st.error("Column 'ts' not found in curated data.")
         return
 
+    # The loader guarantees tz-aware UTC, non-null, ts-ordered rows (no per-view parsing)
+    if not isinstance(dfc["ts"].dtype, pd.DatetimeTZDtype):
+        raise TypeError(f"Expected tz-aware ts from the loader, got {dfc['ts'].dtype}")
+
     # Create 3 tabs: existing + 2 new
     tab_var, tab_diurnal, tab_lag = st.tabs(
         ["Variable Explorer", "Diurnal Cycle", "Thermal Lag"]
     )
 
-    # =====================================================
-    # TAB 1: Variable Explorer (KEEP YOUR CURRENT LOGIC)
-    # =====================================================
+    # Each tab body is an st.fragment: its widgets rerun only that tab, not the whole page
     with tab_var:
-        # Pick numeric columns only (exclude ts)
-        numeric_cols = []
-        for c in dfc.columns:
-            if c == "ts":
-                continue
-            if pd.api.types.is_numeric_dtype(dfc[c]):
-                numeric_cols.append(c)
-
-        if not numeric_cols:
-            st.warning("No numeric columns found to explore.")
-            return
-
-        # Controls
-        colA, colB, colC = st.columns([2, 1, 1], gap="small")
-        with colA:
-            var = st.selectbox("Select variable", numeric_cols, index=0)
-        with colB:
-            agg = st.selectbox("Time aggregation", ["Raw", "Hourly mean", "Daily mean"], index=0)
-        with colC:
-            max_points = st.selectbox("Max points (plot performance)", [2000, 5000, 10000, "All"], index=1)
-
-        # Build series
-        d = dfc[["ts", var]].copy()
-        d = d.dropna(subset=["ts"])
-        d["ts"] = pd.to_datetime(d["ts"], utc=True, errors="coerce")
-        d = d.dropna(subset=["ts"]).sort_values("ts")
-
-        # Apply aggregation
-        if agg != "Raw":
-            freq = "H" if agg == "Hourly mean" else "D"
-            d = d.set_index("ts")[var].resample(freq).mean().reset_index()
-
-        # Optional downsample for plotting
-        if max_points != "All" and len(d) > int(max_points):
-            d = d.iloc[:: max(1, len(d) // int(max_points)), :]
-
-        # Summary stats (use original dfc column, not aggregated)
-        s = dfc[var]
-        n_total = len(s)
-        n_missing = int(s.isna().sum())
-        missing_pct = (n_missing / n_total * 100.0) if n_total else 0.0
-
-        s_clean = s.dropna()
-        stats = {
-            "count": int(s_clean.shape[0]),
-            "missing_%": round(missing_pct, 2),
-            "mean": float(s_clean.mean()) if len(s_clean) else np.nan,
-            "median": float(s_clean.median()) if len(s_clean) else np.nan,
-            "std": float(s_clean.std()) if len(s_clean) else np.nan,
-            "min": float(s_clean.min()) if len(s_clean) else np.nan,
-            "max": float(s_clean.max()) if len(s_clean) else np.nan,
-        }
-
-        # Layout
-        topL, topR = st.columns([3, 1], gap="small")
-
-        with topL:
-            st.subheader("Time series")
-            fig_ts = px.line(d, x="ts", y=var, title=f"{var} over time ({agg})")
-            st.plotly_chart(fig_ts, use_container_width=True)
-
-        with topR:
-            st.subheader("Summary")
-            st.markdown(
-                f"""
-                <div style="
-                padding:12px;
-                border-radius:14px;
-                background: rgba(255,255,255,0.06);
-                border: 1px solid rgba(255,255,255,0.10);
-                font-size:0.85rem;
-                ">
-                <table style="width:100%; border-collapse:collapse;">
-                <tr><td>Count</td><td style="text-align:right;"><b>{stats['count']:,}</b></td></tr>
-                <tr><td>Missing (%)</td><td style="text-align:right;">{stats['missing_%']:.2f}</td></tr>
-                <tr><td>Mean</td><td style="text-align:right;">{stats['mean']:.3f}</td></tr>
-                <tr><td>Median</td><td style="text-align:right;">{stats['median']:.3f}</td></tr>
-                <tr><td>Std</td><td style="text-align:right;">{stats['std']:.3f}</td></tr>
-                <tr><td>Min</td><td style="text-align:right;">{stats['min']:.3f}</td></tr>
-                <tr><td>Max</td><td style="text-align:right;">{stats['max']:.3f}</td></tr>
-                </table>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
+        _variable_explorer(dfc)
+    with tab_diurnal:
+        _diurnal_cycle(dfc)
+    with tab_lag:
+        _thermal_lag(dfc)
 
-        st.divider()
 
-        b1, b2 = st.columns(2, gap="small")
-        with b1:
-            st.subheader("Distribution")
-            dist = s_clean
-            if len(dist) == 0:
-                st.info("No non-missing values for distribution.")
-            else:
-                if len(dist) > 20000:
-                    dist = dist.sample(20000, random_state=42)
-                fig_hist = px.histogram(dist, nbins=40, title=f"Histogram of {var}")
-                st.plotly_chart(fig_hist, use_container_width=True)
-
-        with b2:
-            st.subheader("Box plot (outliers)")
-            dist = s_clean
-            if len(dist) == 0:
-                st.info("No non-missing values for box plot.")
-            else:
-                if len(dist) > 20000:
-                    dist = dist.sample(20000, random_state=42)
-                fig_box = px.box(dist, points="outliers", title=f"Box plot of {var}")
-                st.plotly_chart(fig_box, use_container_width=True)
+# =====================================================
+# TAB 1: Variable Explorer (KEEP YOUR CURRENT LOGIC)
+# =====================================================
+@st.fragment
+def _variable_explorer(dfc: pd.DataFrame):
+    # Pick numeric columns only (exclude ts)
+    numeric_cols = _numeric_cols(tuple((c, str(t)) for c, t in dfc.dtypes.items()))
 
-        with st.expander("Show data (sample)", expanded=False):
-            st.dataframe(dfc[["ts", var]].head(2000), use_container_width=True)
+    if not numeric_cols:
+        st.warning("No numeric columns found to explore.")
+        return
 
-    # =====================================================
-    # TAB 2: Diurnal Cycle (Average by Hour)
-    # =====================================================
+    # Controls
+    colA, colB, colC = st.columns([2, 1, 1], gap="small")
+    with colA:
+        var = st.selectbox("Select variable", numeric_cols, index=0)
+    with colB:
+        agg = st.selectbox("Time aggregation", ["Raw", "Hourly mean", "Daily mean"], index=0)
+    with colC:
+        max_points = st.selectbox("Max points (plot performance)", [2000, 5000, 10000, "All"], index=1)
+
+    # Build series (aggregations are memoised per variable/frequency)
+    if agg == "Raw":
+        d = dfc[["ts", var]]
+    else:
+        d = _resample_mean(dfc, var, "h" if agg == "Hourly mean" else "D")
+
+    # Optional downsample for plotting (LTTB keeps peaks that a fixed stride would drop)
+    if max_points != "All" and len(d) > int(max_points):
+        d = lttb_frame(d, "ts", var, int(max_points))
+
+    # Summary stats (use original dfc column, not aggregated)
+    stats = _variable_stats(dfc, var)
+    s_clean = dfc[var].dropna()
+
+    # Layout
+    topL, topR = st.columns([3, 1], gap="small")
+
+    with topL:
+        st.subheader("Time series")
+        fig_ts = px.line(d, x="ts", y=var, title=f"{var} over time ({agg})", render_mode="webgl")
+        # Same uirevision/key per variable: switching agg or max_points keeps zoom and the chart component
+        fig_ts.update_layout(uirevision=var)
+        st.plotly_chart(fig_ts, use_container_width=True, key=f"eda_ts_{var}")
+
+    with topR:
+        st.subheader("Summary")
+        summary = pd.DataFrame({
+            "stat": ["Count", "Missing (%)", "Mean", "Median", "Std", "Min", "Max"],
+            "value": [
+                f"{stats['count']:,}",
+                f"{stats['missing_%']:.2f}",
+                *(f"{stats[k]:.3f}" for k in ["mean", "median", "std", "min", "max"]),
+            ],
+        })
+        st.dataframe(summary, hide_index=True, use_container_width=True)
+
+    st.divider()
+
+    # One shared (capped) sample for both distribution plots
+    dist = s_clean if len(s_clean) <= 20000 else s_clean.sample(20000, random_state=42)
+
+    b1, b2 = st.columns(2, gap="small")
+    with b1:
+        st.subheader("Distribution")
+        if len(dist) == 0:
+            st.info("No non-missing values for distribution.")
+        else:
+            # Bin server-side: only 40 bar heights go to the browser
+            counts, edges = np.histogram(dist.to_numpy(), bins=40)
+            fig_hist = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), name=var))
+            fig_hist.update_layout(title=f"Histogram of {var}", xaxis_title=var, yaxis_title="count", bargap=0)
+            st.plotly_chart(fig_hist, use_container_width=True)
+
+    with b2:
+        st.subheader("Box plot (outliers)")
+        if len(dist) == 0:
+            st.info("No non-missing values for box plot.")
+        else:
+            fig_box = px.box(dist, points="outliers", title=f"Box plot of {var}")
+            st.plotly_chart(fig_box, use_container_width=True)
+
+    with st.expander("Show data (sample)", expanded=False):
+        st.dataframe(dfc[["ts", var]].head(2000), use_container_width=True)
+
+
+# =====================================================
+# TAB 2: Diurnal Cycle (Average by Hour)
+# =====================================================
+@st.fragment
+def _diurnal_cycle(dfc: pd.DataFrame):
+    st.subheader("Diurnal Cycle (Average by Hour)")
+    st.caption(
+        "Average 24-hour profiles reveal daily forcing effects. "
+        "If variables have different units, enable normalisation to compare shapes fairly."
+    )
 
-    with tab_diurnal:
-        st.subheader("Diurnal Cycle (Average by Hour)")
-        st.caption(
-            "Average 24-hour profiles reveal daily forcing effects. "
-            "If variables have different units, enable normalisation to compare shapes fairly."
+    # Select numeric variables
+    numeric_cols = _numeric_cols(tuple((c, str(t)) for c, t in dfc.dtypes.items()))
+
+    if not numeric_cols:
+        st.warning("No numeric variables available.")
+    else:
+        vars_sel = st.multiselect(
+            "Select variables to compare",
+            options=numeric_cols,
+            default=[c for c in ["solar_rad", "temp_out"] if c in numeric_cols],
+            help="Choose 1–4 variables."
         )
 
-        # Select numeric variables
-        numeric_cols = [
-            c for c in dfc.columns
-            if c != "ts" and pd.api.types.is_numeric_dtype(dfc[c])
-        ]
+        normalise = st.checkbox(
+            "Normalise variables (z-score)",
+            value=True,
+            help="Converts variables to unitless z-scores (mean=0, std=1) to compare diurnal shapes."
+        )
 
-        if not numeric_cols:
-            st.warning("No numeric variables available.")
+        if len(vars_sel) == 0:
+            st.info("Select at least one variable.")
+        elif len(vars_sel) > 4:
+            st.warning("Please select no more than 4 variables for readability.")
         else:
-            vars_sel = st.multiselect(
-                "Select variables to compare",
-                options=numeric_cols,
-                default=[c for c in ["solar_rad", "temp_out"] if c in numeric_cols],
-                help="Choose 1–4 variables."
-            )
+            d = dfc[vars_sel]
+
+            # Hour-of-day means as 24-bucket bincounts (no GroupBy)
+            hours = _hours(dfc)
+            hour_x = np.arange(24)
+
+            fig = go.Figure()
+            for v in vars_sel:
+                vals = d[v].to_numpy(np.float64, na_value=np.nan)
+                valid = ~np.isnan(vals)
+                counts = np.bincount(hours[valid], minlength=24)
+                mean = np.bincount(hours[valid], weights=vals[valid], minlength=24) / np.maximum(counts, 1)
+                mean[counts == 0] = np.nan
+
+                # Optional z-score normalisation (per variable, over the selected range);
+                # z-scoring is affine, so it can be applied to the hourly means directly
+                if normalise:
+                    sd = vals[valid].std(ddof=1) if valid.sum() > 1 else np.nan
+                    if sd > 0:
+                        mean = (mean - vals[valid].mean()) / sd
+                    else:
+                        # If no variance, set to 0 to avoid NaNs exploding
+                        mean = np.where(np.bincount(hours, minlength=24) > 0, 0.0, np.nan)
+
+                fig.add_trace(
+                    go.Scatter(
+                        x=hour_x,
+                        y=mean,
+                        mode="lines+markers",
+                        name=v
+                    )
+                )
+
+            y_title = "Standardised value (z-score)" if normalise else "Hourly mean (original units)"
 
-            normalise = st.checkbox(
-                "Normalise variables (z-score)",
-                value=True,
-                help="Converts variables to unitless z-scores (mean=0, std=1) to compare diurnal shapes."
+            fig.update_layout(
+                title="Diurnal Cycle (Average by Hour)",
+                xaxis_title="Hour of day (0–23)",
+                yaxis_title=y_title,
+                legend_title="Variable",
             )
 
-            if len(vars_sel) == 0:
-                st.info("Select at least one variable.")
-            elif len(vars_sel) > 4:
-                st.warning("Please select no more than 4 variables for readability.")
-            else:
-                d = dfc[["ts"] + vars_sel].dropna(subset=["ts"]).copy()
-                d["ts"] = pd.to_datetime(d["ts"], utc=True, errors="coerce")
-                d = d.dropna(subset=["ts"])
+            st.plotly_chart(fig, use_container_width=True)
 
-                # Optional z-score normalisation (per variable, over the selected range)
-                if normalise:
-                    for v in vars_sel:
-                        mu = d[v].mean(skipna=True)
-                        sd = d[v].std(skipna=True)
-                        if sd and sd > 0:
-                            d[v] = (d[v] - mu) / sd
-                        else:
-                            # If no variance, set to 0 to avoid NaNs exploding
-                            d[v] = 0.0
-
-                # Hour-of-day aggregation
-                d["hour"] = d["ts"].dt.hour
-                g = d.groupby("hour")[vars_sel].mean(numeric_only=True).reset_index()
-
-                fig = go.Figure()
-                for v in vars_sel:
-                    fig.add_trace(
-                        go.Scatter(
-                            x=g["hour"],
-                            y=g[v],
-                            mode="lines+markers",
-                            name=v
-                        )
-                    )
+            if normalise:
+                st.info(
+                    "Normalisation removes unit differences, so the plot should be interpreted as "
+                    "relative diurnal patterns (shape/phase), not absolute magnitudes."
+                )
+            else:
+                st.info(
+                    "Variables are shown in original units. Interpret relative patterns rather than absolute magnitudes."
+                )
 
-                y_title = "Standardised value (z-score)" if normalise else "Hourly mean (original units)"
 
-                fig.update_layout(
-                    title="Diurnal Cycle (Average by Hour)",
-                    xaxis_title="Hour of day (0–23)",
-                    yaxis_title=y_title,
-                    legend_title="Variable",
-                )
+# =====================================================
+# TAB 3: Thermal Lag (Cross-Correlation)
+# =====================================================
+@st.fragment
+def _thermal_lag(dfc: pd.DataFrame):
+    st.subheader("Thermal Lag (Cross-Correlation)")
+    st.caption("Cross-correlation between Solar_Rad and Indoor Temperature to quantify lag.")
 
-                st.plotly_chart(fig, use_container_width=True)
+    # Handle naming differences for indoor temperature
+    # Your dataset/schema may use temp_in OR in_temp OR in_temp
+    indoor_candidates = [c for c in ["temp_in", "in_temp", "in_temp_in", "in_temperature"] if c in dfc.columns]
+    if "solar_rad" not in dfc.columns:
+        st.warning("Missing required column: solar_rad")
+        return
+    if not indoor_candidates:
+        st.warning("No indoor temperature column found. Expected one of: temp_in / in_temp")
+        return
 
-                if normalise:
-                    st.info(
-                        "Normalisation removes unit differences, so the plot should be interpreted as "
-                        "relative diurnal patterns (shape/phase), not absolute magnitudes."
-                    )
-                else:
-                    st.info(
-                        "Variables are shown in original units. Interpret relative patterns rather than absolute magnitudes."
-                    )
+    indoor_col = st.selectbox("Indoor temperature column", indoor_candidates, index=0)
+    max_lag = st.slider("Max lag (hours)", 1, 24, 12)
 
+    # Prepare data: hourly means (bincount over hour bins) to stabilise signal
+    bins = _hourly_bin_index(dfc)
+    solar = _hourly_mean(bins, dfc["solar_rad"].to_numpy(dtype=np.float64, na_value=np.nan))
+    indoor = _hourly_mean(bins, dfc[indoor_col].to_numpy(dtype=np.float64, na_value=np.nan))
 
-    # =====================================================
-    # TAB 3: Thermal Lag (Cross-Correlation)
-    # =====================================================
-    with tab_lag:
-        st.subheader("Thermal Lag (Cross-Correlation)")
-        st.caption("Cross-correlation between Solar_Rad and Indoor Temperature to quantify lag.")
-
-        # Handle naming differences for indoor temperature
-        # Your dataset/schema may use temp_in OR in_temp OR in_temp
-        indoor_candidates = [c for c in ["temp_in", "in_temp", "in_temp_in", "in_temperature"] if c in dfc.columns]
-        if "solar_rad" not in dfc.columns:
-            st.warning("Missing required column: solar_rad")
-            return
-        if not indoor_candidates:
-            st.warning("No indoor temperature column found. Expected one of: temp_in / in_temp")
-            return
-
-        indoor_col = st.selectbox("Indoor temperature column", indoor_candidates, index=0)
-        max_lag = st.slider("Max lag (hours)", 1, 24, 12)
-
-        # Prepare data: resample to hourly mean to stabilise signal
-        d = dfc[["ts", "solar_rad", indoor_col]].dropna(subset=["ts"]).copy()
-        d["ts"] = pd.to_datetime(d["ts"], utc=True, errors="coerce")
-        d = d.dropna(subset=["ts"]).sort_values("ts")
-
-        d = d.set_index("ts")[["solar_rad", indoor_col]].resample("H").mean()
-
-        # Compute cross-correlation Solar_Rad(t) vs Indoor(t+lag)
-        lags = list(range(-max_lag, max_lag + 1))
-        corrs = []
-        for lag in lags:
-            corrs.append(d["solar_rad"].corr(d[indoor_col].shift(lag)))
-
-        fig = px.line(
-            x=lags,
-            y=corrs,
-            labels={"x": "Lag (hours)", "y": "Pearson correlation"},
-            title=f"Cross-Correlation: Solar_Rad vs {indoor_col}",
-        )
-        st.plotly_chart(fig, use_container_width=True)
+    # Compute cross-correlation Solar_Rad(t) vs Indoor(t+lag)
+    lags = np.arange(-max_lag, max_lag + 1)
+    corrs = _lagged_corr(solar, indoor, max_lag)
 
-        # Peak lag (ignore NaNs safely)
-        if all(pd.isna(c) for c in corrs):
-            st.warning("Unable to compute correlation (insufficient overlap after resampling).")
-        else:
-            idx = int(np.nanargmax(corrs))
-            peak_lag = lags[idx]
-            peak_corr = corrs[idx]
-            st.success(f"Peak correlation at lag = {peak_lag} hours (r = {peak_corr:.2f})")
+    fig = px.line(
+        x=lags,
+        y=corrs,
+        labels={"x": "Lag (hours)", "y": "Pearson correlation"},
+        title=f"Cross-Correlation: Solar_Rad vs {indoor_col}",
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Peak lag (ignore NaNs safely)
+    if np.isnan(corrs).all():
+        st.warning("Unable to compute correlation (insufficient overlap after resampling).")
+    else:
+        idx = int(np.nanargmax(corrs))
+        peak_lag = int(lags[idx])
+        peak_corr = corrs[idx]
+        st.success(f"Peak correlation at lag = {peak_lag} hours (r = {peak_corr:.2f})")
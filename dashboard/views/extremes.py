@@ -1,26 +1,31 @@
 # dashboard/views/extremes.py
+import pandas as pd
 import plotly.express as px
 import streamlit as st
 
+from dashboard.components import CACHE_TTL, FRAME_HASH
+
+TOP_N_MAX = 50
+
+
+@st.cache_data(max_entries=8, ttl=CACHE_TTL, show_spinner=False, hash_funcs=FRAME_HASH)
+def _top_extremes(dfc: pd.DataFrame, metric: str) -> pd.DataFrame:
+    # Partial selection of the largest TOP_N_MAX rows (no full sort); the slider then just slices
+    return dfc[["ts", metric]].dropna().nlargest(TOP_N_MAX, metric)
+
 
 def render(dfc):
     st.title("Extremes")
     st.caption("Identify extreme moments (wind excluded).")
 
     metric = st.selectbox("Extreme metric", ["rain_rate", "temp_out", "solar_rad", "uv_index", "out_hum"], index=0)
-    n = st.slider("Top N", 5, 50, 15)
+    n = st.slider("Top N", 5, TOP_N_MAX, 15)
 
     if metric not in dfc.columns:
         st.warning(f"{metric} not available.")
         return
 
-    top = (
-        dfc[["ts", metric]]
-        .dropna()
-        .sort_values(metric, ascending=False)
-        .head(n)
-        .reset_index(drop=True)
-    )
+    top = _top_extremes(dfc, metric).head(n).reset_index(drop=True)
 
     # Add Rank column
     top.insert(0, "Rank", range(1, len(top) + 1))
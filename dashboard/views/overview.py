@@ -1,7 +1,34 @@
 # dashboard/views/overview.py
+import pandas as pd
 import plotly.express as px
 import streamlit as st
-from dashboard.components import kpi_card, weather_icon, fmt
+from dashboard.components import CACHE_TTL, FRAME_HASH, kpi_card, weather_icon, fmt, lttb_frame
+
+
+# Column -> reductions needed for the KPI row (computed in one agg call)
+RANGE_AGGS = {
+    "rain_rate": ["max"],
+    "solar_rad": ["max"],
+    "temp_out": ["mean"],
+    "rain": ["max", "min"],
+}
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False, hash_funcs=FRAME_HASH)
+def _summarize_range(dfc: pd.DataFrame) -> dict:
+    # Memoised: changing the metric selectbox below doesn't re-derive the KPIs
+    agg = dfc.agg({c: f for c, f in RANGE_AGGS.items() if c in dfc.columns})
+
+    def safe_agg(col, func):
+        return agg.at[func, col] if col in agg.columns else None
+
+    rain_max, rain_min = safe_agg("rain", "max"), safe_agg("rain", "min")
+    return {
+        "rain_rate_max": safe_agg("rain_rate", "max"),
+        "solar_max": safe_agg("solar_rad", "max"),
+        "temp_mean": safe_agg("temp_out", "mean"),
+        "rain_total": rain_max - rain_min if rain_max is not None and pd.notna(rain_max) else None,
+    }
 
 
 def render(dfc):
@@ -9,21 +36,21 @@ def render(dfc):
 
     c1, c2, c3, c4 = st.columns(4, gap="large")
 
+    summary = _summarize_range(dfc)
     icon, cond = weather_icon(
-        dfc["rain_rate"].max() if "rain_rate" in dfc else None,
-        dfc["solar_rad"].max() if "solar_rad" in dfc else None,
+        summary["rain_rate_max"],
+        summary["solar_max"],
         None,  # wind unavailable
     )
 
     with c1:
         kpi_card("Condition (range)", f"{icon} {cond}", "Heuristic from rain/solar", icon="🛰️")
     with c2:
-        kpi_card("Avg temp", fmt(dfc["temp_out"].mean(), "°C"), "Mean outdoor temperature", icon="🌡️")
+        kpi_card("Avg temp", fmt(summary["temp_mean"], "°C"), "Mean outdoor temperature", icon="🌡️")
     with c3:
-        kpi_card("Max rain rate", fmt(dfc["rain_rate"].max(), " mm/h"), "Peak rain intensity", icon="🌧️")
+        kpi_card("Max rain rate", fmt(summary["rain_rate_max"], " mm/h"), "Peak rain intensity", icon="🌧️")
     with c4:
-        rain_total = (dfc["rain"].max() - dfc["rain"].min()) if "rain" in dfc and dfc["rain"].notna().any() else None
-        kpi_card("Total rain", fmt(rain_total, " mm"), "Delta of cumulative rain", icon="🌦️")
+        kpi_card("Total rain", fmt(summary["rain_total"], " mm"), "Delta of cumulative rain", icon="🌦️")
 
     st.divider()
 
@@ -31,7 +58,9 @@ def render(dfc):
     metric = st.selectbox("Metric", ["temp_out", "out_hum", "bar", "rain_rate", "solar_rad", "uv_index"], index=0)
 
     if metric in dfc.columns:
-        fig = px.line(dfc, x="ts", y=metric, title=f"{metric} over time")
+        # LTTB down to a fixed point budget: same visual shape, far less JSON to the browser
+        d = lttb_frame(dfc, "ts", metric, 5000)
+        fig = px.line(d, x="ts", y=metric, title=f"{metric} over time", render_mode="webgl")
         st.plotly_chart(fig, use_container_width=True)
     else:
         st.info(f"{metric} not available in selected range.")
@@ -7,8 +7,26 @@ from sklearn.decomposition import PCA
 import plotly.graph_objects as go
 import numpy as np
 
+from analytics.export_projector_tsv import write_range_tsv
 
-def render(dff):
+
+@st.cache_data(show_spinner=False)
+def _scree(X_bytes: bytes, shape: tuple[int, int], cols: tuple[str, ...]) -> tuple[np.ndarray, list[str]]:
+    # Keyed on the raw float32 matrix bytes (cheap to hash, no pandas hashing); cols only label the key
+    X = np.frombuffer(X_bytes, dtype=np.float32).reshape(shape)
+
+    # Standardise features (float32 throughout: sensor readings don't need float64)
+    Xs = StandardScaler().fit_transform(X)
+
+    # Fit PCA with all possible components; N >> K, so eigendecompose the KxK covariance
+    pca = PCA(svd_solver="covariance_eigh")
+    pca.fit(Xs)
+
+    evr = pca.explained_variance_ratio_
+    return evr, [f"PC{i+1}" for i in range(len(evr))]
+
+
+def render(dff, cluster_summary):
     st.title("PCA & Regimes")
     st.caption(
         "Dimensionality reduction and regime discovery using PCA and clustering. "
@@ -23,23 +41,15 @@ def render(dff):
     )
 
     if show_scree:
-        # Use original feature columns (not PCs)
-        feature_cols = [c for c in dff.columns if c.startswith("f_")]
+        # Use original feature columns (not PCs); all-null ones (f_wind_speed: no sensor)
+        # would make the row-wise dropna below empty
+        feature_cols = [c for c in dff.columns if c.startswith("f_") and dff[c].notna().any()]
 
         if len(feature_cols) < 2:
             st.warning("Not enough features available to compute PCA.")
         else:
-            X = dff[feature_cols].dropna()
-
-            # Standardise features
-            Xs = StandardScaler().fit_transform(X)
-
-            # Fit PCA with all possible components
-            pca = PCA()
-            pca.fit(Xs)
-
-            evr = pca.explained_variance_ratio_
-            pcs = [f"PC{i+1}" for i in range(len(evr))]
+            X = dff[feature_cols].dropna().to_numpy(np.float32)
+            evr, pcs = _scree(X.tobytes(), X.shape, tuple(feature_cols))
 
             fig = go.Figure()
 
@@ -108,28 +118,12 @@ def render(dff):
             y="pc2",
             color="cluster_label",
             hover_data=["ts", "model_version"],
+            render_mode="webgl",
         )
         st.plotly_chart(fig, use_container_width=True)
 
-        feat_cols = [
-            c for c in [
-                "f_temp_out",
-                "f_out_hum",
-                "f_bar",
-                "f_rain_rate",
-                "f_solar_rad",
-                "f_uv_index",
-            ]
-            if c in dff.columns
-        ]
-
         st.subheader("Cluster summary (mean of standardised features)")
-        st.dataframe(
-            dff.groupby("cluster_label")[feat_cols]
-            .mean()
-            .round(3),
-            use_container_width=True,
-        )
+        st.dataframe(cluster_summary, use_container_width=True)
 
     # -----------------------------
     # TensorFlow Projector Export
@@ -141,8 +135,9 @@ def render(dff):
             "at https://projector.tensorflow.org/"
         )
 
+        # compute_features writes the full-history files; the button exports the
+        # selected range into its own sub-folder
         out_dir = os.getenv("PROJECTOR_OUT_DIR", "data/processed")
-        os.makedirs(out_dir, exist_ok=True)
         vecs_path = os.path.join(out_dir, "vecs.tsv")
         meta_path = os.path.join(out_dir, "meta.tsv")
 
@@ -150,29 +145,8 @@ def render(dff):
 
         with colA:
             if st.button("Generate TSV files"):
-                # Vectors (PC1–PC3), no header
-                dff[["pc1", "pc2", "pc3"]].to_csv(
-                    vecs_path, sep="\t", index=False, header=False
-                )
-
-                # Metadata
-                meta_cols = [
-                    "ts",
-                    "cluster_label",
-                    "model_version",
-                    "f_temp_out",
-                    "f_out_hum",
-                    "f_bar",
-                    "f_rain_rate",
-                    "f_solar_rad",
-                    "f_uv_index",
-                ]
-                meta_cols = [c for c in meta_cols if c in dff.columns]
-                meta = dff[meta_cols].copy()
-                meta["ts"] = meta["ts"].astype(str)
-                meta.to_csv(meta_path, sep="\t", index=False)
-
-                st.success("TSV files generated successfully.")
+                range_dir = write_range_tsv(dff, out_dir)
+                st.success(f"TSV files for the selected range written to {range_dir}")
 
         with colB:
             st.code(
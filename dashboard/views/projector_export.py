@@ -2,6 +2,8 @@
 import os
 import streamlit as st
 
+from analytics.export_projector_tsv import write_range_tsv
+
 
 def render(dff):
     st.title("Projector Export")
@@ -12,25 +14,17 @@ def render(dff):
         return
 
     out_dir = os.getenv("PROJECTOR_OUT_DIR", "data/processed")
-    os.makedirs(out_dir, exist_ok=True)
-    vecs_path = f"{out_dir}/vecs.tsv"
-    meta_path = f"{out_dir}/meta.tsv"
+    vecs_path = os.path.join(out_dir, "vecs.tsv")
+    meta_path = os.path.join(out_dir, "meta.tsv")
 
     if st.button("Generate TSV files"):
-        dff[["pc1", "pc2", "pc3"]].to_csv(vecs_path, sep="\t", index=False, header=False)
-
-        meta_cols = [
-            "ts", "cluster_label", "model_version",
-            "f_temp_out", "f_out_hum", "f_bar", "f_rain_rate", "f_solar_rad", "f_uv_index"
-        ]
-        meta_cols = [c for c in meta_cols if c in dff.columns]
-        meta = dff[meta_cols].copy()
-        meta["ts"] = meta["ts"].astype(str)
-        meta.to_csv(meta_path, sep="\t", index=False)
-
-        st.success("Exported TSV files.")
-        st.code(f"Vectors: {vecs_path}\nMetadata: {meta_path}")
+        # Selected range only, in its own sub-folder (the full-history files stay as they are)
+        range_dir = write_range_tsv(dff, out_dir)
+        st.success(f"Exported TSV files for the selected range to {range_dir}")
 
+    # Full history, written by compute_features
+    if os.path.exists(vecs_path) and os.path.exists(meta_path):
+        st.code(f"Vectors: {vecs_path}\nMetadata: {meta_path}")
         with open(vecs_path, "rb") as f:
             st.download_button("Download vecs.tsv", data=f, file_name="vecs.tsv")
         with open(meta_path, "rb") as f:
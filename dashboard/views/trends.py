@@ -4,19 +4,53 @@ import pandas as pd
 import plotly.express as px
 import streamlit as st
 
+from dashboard.components import CACHE_TTL, FRAME_HASH, lttb_frame
+
 
 CORE_COLS = ["temp_out", "out_hum", "bar", "rain_rate", "solar_rad", "uv_index", "dew_pt"]
 
 
-def _available_cols(dfc):
-    return [c for c in CORE_COLS if c in dfc.columns]
+def _available_cols(df):
+    return [c for c in CORE_COLS if c in df.columns]
+
+
+def _corr_matrix(df: pd.DataFrame, cols: tuple) -> pd.DataFrame:
+    # Pearson r on complete rows; sample large ranges, the heatmap doesn't need every row
+    arr = df[list(cols)].to_numpy(dtype=np.float32)
+    arr = arr[np.isfinite(arr).all(axis=1)]
+    if len(arr) > 50_000:
+        arr = arr[np.random.default_rng(0).choice(len(arr), 50_000, replace=False)]
+    c = np.corrcoef(arr, rowvar=False)
+    return pd.DataFrame(c, index=list(cols), columns=list(cols))
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False, hash_funcs=FRAME_HASH)
+def _corr_figure(df: pd.DataFrame, cols: tuple):
+    # Keyed on the column tuple + frame fingerprint: reruns skip both the corr pass and px.imshow
+    corr = _corr_matrix(df, cols)
+    return px.imshow(corr, text_auto=True, aspect="auto", title="Correlation heatmap (Pearson r)")
 
 
-def render(dfc):
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False, hash_funcs=FRAME_HASH)
+def _seasonality_figure(daily: pd.DataFrame, metric: str):
+    # daily: per-day means aggregated in SQL; asfreq keeps empty days as gaps
+    d = daily.set_index("ts")[metric].asfreq("D").reset_index()
+    if len(d) > 2000:
+        # Multi-year ranges: LTTB to a fixed point budget (keeps extremes, unlike random sampling)
+        d = lttb_frame(d, "ts", metric, 2000)
+    return px.line(d, x="ts", y=metric, title=f"Daily mean: {metric}", render_mode="webgl")
+
+
+def _open_corr():
+    st.session_state["trends_corr_opened"] = True
+
+
+def render(dfc, daily):
     st.title("Trends")
     st.caption("Explore seasonality and relationships between key weather variables (correlation = association, not causality).")
 
-    cols = _available_cols(dfc)
+    # Column list from the daily aggregate: dfc is only loaded once the heatmap is opened
+    cols = _available_cols(daily)
     if len(cols) < 2:
         st.warning("Not enough columns available in this range.")
         return
@@ -28,19 +62,21 @@ def render(dfc):
     # -----------------------------
     with tab1:
         metric = st.selectbox("Metric", cols, index=0)
-        if metric in dfc.columns:
-            d = dfc.set_index("ts")[metric].resample("D").mean().reset_index()
-            fig = px.line(d, x="ts", y=metric, title=f"Daily mean: {metric}")
-            st.plotly_chart(fig, use_container_width=True)
+        if metric in daily.columns:
+            st.plotly_chart(_seasonality_figure(daily, metric), use_container_width=True)
 
     # -----------------------------
     # Tab 2: Correlation heatmap (overall view)
     # -----------------------------
     with tab2:
+        # Tab bodies run on every rerun, so the curated load (app.py) and the corr pass wait
+        # until the heatmap is asked for
+        if not st.session_state.get("trends_corr_opened", False):
+            st.button("Load correlation heatmap", on_click=_open_corr)
+            return
+
         pick = st.multiselect("Columns", cols, default=cols)
         if len(pick) >= 2:
-            corr = dfc[pick].corr(numeric_only=True)
-            fig = px.imshow(corr, text_auto=True, aspect="auto", title="Correlation heatmap (Pearson r)")
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(_corr_figure(dfc, tuple(pick)), use_container_width=True)
         else:
             st.info("Pick at least 2 columns.")
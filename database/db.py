@@ -1,13 +1,24 @@
 # database/db.py
+import functools
+import io
 import os
-from sqlalchemy import create_engine
+import pandas as pd
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.engine import Engine
 from dotenv import load_dotenv
 
+try:
+    import connectorx as cx
+except ImportError:  # no wheel for this platform: fall back to pandas.read_sql
+    cx = None
+
 # Load .env once, globally
 load_dotenv()
 
+@functools.lru_cache(maxsize=1)
 def get_engine() -> Engine:
+    # One Engine (and one connection pool) per process; Streamlit reruns reuse it
     db_url = os.getenv("DATABASE_URL")
     if not db_url:
         raise RuntimeError("DATABASE_URL is not set. Check your .env file.")
@@ -20,5 +31,87 @@ def get_engine() -> Engine:
     return create_engine(
         db_url,
         pool_pre_ping=True,
+        pool_size=5,
+        max_overflow=10,
+        pool_recycle=1800,  # recycle before server/proxy idle timeouts drop connections
         connect_args=connect_args,
     )
+
+
+def _connectorx_dsn() -> str:
+    # connectorx wants a plain postgresql:// URL (no "+psycopg2" driver suffix)
+    url = make_url(os.environ["DATABASE_URL"]).set(drivername="postgresql")
+    sslmode = os.getenv("PGSSLMODE")
+    if sslmode:
+        url = url.update_query_dict({"sslmode": sslmode})
+    return url.render_as_string(hide_password=False)
+
+
+def read_sql_df(sql: str, params: dict | None = None, parse_dates: list[str] | None = None) -> pd.DataFrame:
+    """
+    Run a SELECT and return a DataFrame via connectorx (Arrow columnar transfer,
+    no per-row Python tuples). Named :params are rendered as escaped literals,
+    since connectorx has no bind-parameter support.
+    parse_dates: TIMESTAMPTZ columns to return as datetime64[ns, UTC].
+    Falls back to pandas.read_sql when connectorx isn't installed.
+    """
+    if not os.getenv("DATABASE_URL"):
+        raise RuntimeError("DATABASE_URL is not set. Check your .env file.")
+
+    parse_dates = parse_dates or []
+    stmt = text(sql)
+    if cx is None:
+        return pd.read_sql(stmt, get_engine(), params=params, parse_dates={c: {"utc": True} for c in parse_dates})
+
+    if params:
+        stmt = stmt.bindparams(**params)
+    query = str(stmt.compile(dialect=postgresql.dialect(paramstyle="named"), compile_kwargs={"literal_binds": True}))
+    df = cx.read_sql(_connectorx_dsn(), query.strip().rstrip(";"), return_type="pandas")
+    # connectorx returns TIMESTAMPTZ as naive UTC
+    for c in parse_dates:
+        if df[c].dt.tz is None:
+            df[c] = df[c].dt.tz_localize("UTC")
+    return df
+
+
+def copy_upsert(eng: Engine, df: pd.DataFrame, table: str, key: str = "ts", touch_col: str | None = None) -> int:
+    """
+    Bulk upsert `df` into `table` via COPY into a temp staging table,
+    then a single INSERT ... SELECT ... ON CONFLICT (key) DO UPDATE.
+    Columns are taken from df (must match table column names).
+    Conflicting rows are only rewritten when a value actually differs, so
+    touch_col (e.g. "updated_at") is set to NOW() only on real changes.
+    """
+    cols = list(df.columns)
+    col_list = ", ".join(cols)
+    value_cols = [c for c in cols if c != key]
+    updates = [f"{c} = EXCLUDED.{c}" for c in value_cols]
+    if touch_col:
+        updates.append(f"{touch_col} = NOW()")
+
+    # NaN/None are written as empty fields, which COPY CSV reads as NULL
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, header=False)
+    buf.seek(0)
+
+    raw = eng.raw_connection()
+    try:
+        with raw.cursor() as cur:
+            cur.execute(f"CREATE TEMP TABLE _staging (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP;")
+            cur.copy_expert(f"COPY _staging ({col_list}) FROM STDIN WITH (FORMAT CSV)", buf)
+            cur.execute(f"""
+                INSERT INTO {table} AS t ({col_list})
+                SELECT {col_list} FROM _staging
+                ON CONFLICT ({key}) DO UPDATE SET
+                  {", ".join(updates)}
+                WHERE ({", ".join(f"t.{c}" for c in value_cols)})
+                  IS DISTINCT FROM ({", ".join(f"EXCLUDED.{c}" for c in value_cols)});
+            """)
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+    return len(df)
@@ -70,8 +70,8 @@ CREATE TABLE IF NOT EXISTS bradford.weather_curated (
   updated_at   TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
-CREATE INDEX IF NOT EXISTS idx_weather_curated_ts
-  ON bradford.weather_curated (ts);
+-- ts range scans use the PRIMARY KEY btree; a second btree on ts only doubled write/index cost
+DROP INDEX IF EXISTS bradford.idx_weather_curated_ts;
 
 -- FEATURES
 CREATE TABLE IF NOT EXISTS bradford.weather_features (
@@ -2,17 +2,48 @@ import os
 import json
 import pandas as pd
 from sqlalchemy import text
-from database.db import get_engine
+from database.db import get_engine, copy_upsert
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json fallback
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # optional: pandas C parser fallback
+    pacsv = None
+
+
+def _dumps(record: dict) -> str:
+    # orjson encodes in C (and writes NaN as null, which JSONB accepts)
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(record)
+
+
+def read_csv(csv_path: str, text_cols: list[str]) -> pd.DataFrame:
+    # Multithreaded Arrow parse when pyarrow is available. text_cols (Date/Time) are pinned
+    # to strings: Arrow would otherwise infer "16:00" as a time and change the payload.
+    if pacsv is None:
+        return pd.read_csv(csv_path)
+    convert = pacsv.ConvertOptions(column_types={c: pa.string() for c in text_cols})
+    return pacsv.read_csv(csv_path, convert_options=convert).to_pandas()
+
 
 def build_ts(df: pd.DataFrame, date_col: str, time_col: str, dayfirst: bool) -> pd.Series:
     # Combine Date + Time into a UTC timestamp
     # Your CSV Date looks like "13/11/2024" => dayfirst=True
-    dt = pd.to_datetime(
-        df[date_col].astype(str) + " " + df[time_col].astype(str),
-        errors="coerce",
-        dayfirst=dayfirst,
-        utc=True,
-    )
+    stamp = df[date_col].astype(str) + " " + df[time_col].astype(str)
+    # Explicit format keeps pandas on its strptime fast path (no per-row inference)
+    fmt = "%d/%m/%Y %H:%M" if dayfirst else "%m/%d/%Y %H:%M"
+    dt = pd.to_datetime(stamp, format=fmt, errors="coerce", utc=True)
+
+    # Rows in any other layout (e.g. with seconds) go through the generic parser as before
+    miss = dt.isna()
+    if miss.any():
+        dt[miss] = pd.to_datetime(stamp[miss], errors="coerce", dayfirst=dayfirst, utc=True)
     return dt
 
 def main():
@@ -22,21 +53,25 @@ def main():
     dayfirst = os.getenv("DATE_FORMAT_DAYFIRST", "true").lower() == "true"
     source_file = os.getenv("SOURCE_FILE", os.path.basename(csv_path))
 
-    df = pd.read_csv(csv_path)
+    df = read_csv(csv_path, [date_col, time_col])
 
     if date_col not in df.columns or time_col not in df.columns:
         raise ValueError(f"CSV must contain columns '{date_col}' and '{time_col}'")
 
     df["ts"] = build_ts(df, date_col, time_col, dayfirst=dayfirst)
-    df = df.dropna(subset=["ts"]).copy()
-    df = df.drop_duplicates(subset=["ts"]).sort_values("ts")
+    # One sort, then a boolean mask for duplicates (stable sort: "first" = first in source order)
+    df = df[df["ts"].notna()].sort_values("ts", kind="stable")
+    df = df[~df["ts"].duplicated(keep="first")]
 
     # Build JSON payload (keep ALL original columns for lineage)
     payload_cols = [c for c in df.columns if c != "ts"]
-    rows = []
-    for _, r in df.iterrows():
-        payload = {c: r[c] for c in payload_cols}
-        rows.append({"ts": r["ts"], "payload": json.dumps(payload), "source_file": source_file})
+    # Column-wise tolist() (C-level unboxing) + zip, instead of to_dict(orient="records")
+    values = zip(*(df[c].tolist() for c in payload_cols))
+    rows = pd.DataFrame({
+        "ts": df["ts"],
+        "payload": [_dumps(dict(zip(payload_cols, v))) for v in values],
+        "source_file": source_file,
+    })
 
     eng = get_engine()
     with eng.begin() as conn:
@@ -50,14 +85,8 @@ def main():
             );
         """))
 
-        conn.execute(text("""
-            INSERT INTO bradford.weather_raw (ts, payload, source_file)
-            VALUES (:ts, CAST(:payload AS JSONB), :source_file)
-            ON CONFLICT (ts) DO UPDATE SET
-              payload = EXCLUDED.payload,
-              source_file = EXCLUDED.source_file,
-              ingested_at = NOW();
-        """), rows)
+    # COPY into a staging table + one INSERT ... ON CONFLICT (no per-row binds)
+    copy_upsert(eng, rows, "bradford.weather_raw", key="ts", touch_col="ingested_at")
 
     print(f"Upserted {len(rows)} rows into bradford.weather_raw")
 